@@ -1,11 +1,341 @@
+import logging
 import os
 import tempfile
-from subprocess import PIPE, STDOUT, Popen
-from typing import Any
+import threading
+import uuid
+from subprocess import DEVNULL, PIPE, STDOUT, Popen
+from typing import IO, Any, Iterator, List, Optional, Tuple
 
 import prefect
 from prefect.utilities.tasks import defaults_from_attrs
 
+# shells which understand the subshell / `eval` / `printf` protocol used by `_ShellWorker`
+# and run simple commands exactly as `execve` would; any other shell gets a fresh process
+# for every command
+_POSIX_SHELLS = {"bash", "sh", "zsh", "dash", "ksh"}
+
+# characters which require a shell to interpret the command
+_SHELL_METACHARACTERS = frozenset("|&;<>()$`\\\"'\n*?[]{}~#!")
+
+# builtins and reserved words which have no executable of their own, whose executable
+# would not affect the calling shell, or whose executable behaves differently from the
+# builtin (e.g. `echo --help` or `echo -e` under sh)
+_SHELL_BUILTINS = frozenset(
+    [
+        ".",
+        ":",
+        "[",
+        "[[",
+        "alias",
+        "bg",
+        "builtin",
+        "case",
+        "cd",
+        "command",
+        "declare",
+        "dirs",
+        "disown",
+        "do",
+        "done",
+        "echo",
+        "eval",
+        "exec",
+        "exit",
+        "export",
+        "false",
+        "fg",
+        "for",
+        "function",
+        "getopts",
+        "hash",
+        "if",
+        "jobs",
+        "kill",
+        "let",
+        "local",
+        "popd",
+        "print",
+        "printf",
+        "pushd",
+        "pwd",
+        "read",
+        "readonly",
+        "return",
+        "select",
+        "set",
+        "shift",
+        "shopt",
+        "source",
+        "test",
+        "time",
+        "times",
+        "trap",
+        "true",
+        "type",
+        "typeset",
+        "ulimit",
+        "umask",
+        "unalias",
+        "unset",
+        "until",
+        "wait",
+        "whence",
+        "while",
+    ]
+)
+
+
+def _direct_argv(command: str) -> Optional[List[str]]:
+    """
+    Split a command into an argument list which can be executed without a shell, if the
+    command is a single program invocation with plain arguments.
+
+    Args:
+        - command (str): the shell command
+
+    Returns:
+        - List[str]: the arguments to execute, or `None` if the command requires a shell
+    """
+    if any(ch in _SHELL_METACHARACTERS for ch in command):
+        return None
+
+    # nothing else imported by 'import prefect' needs `shlex`, so import it just-in-time
+    # to keep the 'import prefect' time low
+    import shlex
+
+    argv = shlex.split(command)
+    # variable assignments such as `FOO=bar cmd` have to be handled by the shell
+    if not argv or argv[0] in _SHELL_BUILTINS or "=" in argv[0]:
+        return None
+    return argv
+
+
+def _spawn(args: List[str], env: Optional[dict], **kwargs: Any) -> Popen:
+    """
+    Start a process with stderr merged into a single stdout pipe. Unless `stdin` is
+    provided, the process reads from `/dev/null`, matching commands run in a pooled shell.
+
+    File descriptors are closed in the child unless `prefect.config.tasks.shell.close_fds`
+    is `False`, which skips scanning for open descriptors when starting the process (and
+    lets CPython use `posix_spawn` in more cases). Descriptors created by Python are
+    non-inheritable by default, so only those explicitly marked inheritable are then
+    shared with the child.
+
+    Args:
+        - args (List[str]): the program and arguments to execute
+        - env (dict, optional): the environment for the process; if `None`, the
+            environment of the current process is inherited
+        - **kwargs: additional keyword arguments to pass to `Popen`
+
+    Returns:
+        - Popen: the started process
+    """
+    close_fds = prefect.config.tasks.get("shell", {}).get("close_fds", True)
+    kwargs.setdefault("stdin", DEVNULL)
+    return Popen(
+        args, stdout=PIPE, stderr=STDOUT, env=env, close_fds=close_fds, **kwargs
+    )
+
+
+class _ShellWorker:
+    """
+    A long-lived shell process which executes commands written to its stdin.
+
+    Each command is run in a subshell with stdin redirected from `/dev/null`, so that
+    changes to the working directory, variables, or an explicit `exit` do not leak into
+    subsequent commands and the command can never consume the worker's own input. The
+    subshell first changes into the caller's current working directory, and waits for
+    any background jobs it started before exiting. Once the subshell finishes, the worker
+    prints a unique sentinel line carrying the exit code. Process-wide state other than
+    the working directory and environment, such as the umask, is captured when the
+    worker starts.
+
+    Args:
+        - shell (str): the shell executable to run
+        - env (dict, optional): the environment for the shell process; if `None`, the
+            environment of the current process is inherited
+        - key (tuple): the key identifying which commands this worker may be reused for
+    """
+
+    def __init__(self, shell: str, env: Optional[dict], key: tuple) -> None:
+        self.key = key
+        self.process = _spawn([shell], env, stdin=PIPE)
+        self.returncode = None  # type: Optional[int]
+        self.ready = True
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def execute(self, script: str) -> Iterator[bytes]:
+        """
+        Run the provided script, yielding each raw line of its combined stdout / stderr.
+        Once exhausted, `returncode` holds the exit code of the script.
+
+        Args:
+            - script (str): the script to run
+
+        Returns:
+            - Iterator[bytes]: the lines of output produced by the script
+        """
+        import shlex
+
+        self.ready = False
+        self.returncode = None
+        sentinel = "__PREFECT_EOF__{}".format(uuid.uuid4().hex)
+        # run in the caller's current directory, and wait for any background jobs so
+        # their output can't leak into the next command run by this worker
+        payload = (
+            "( trap wait EXIT; cd -- {cwd} || exit; eval {script}; rc=$?; wait; exit $rc )"
+            " < /dev/null\nprintf '\\n%s:%d\\n' {sentinel} \"$?\"\n"
+        ).format(
+            cwd=shlex.quote(os.getcwd()), script=shlex.quote(script), sentinel=sentinel,
+        )
+        marker = sentinel.encode() + b":"
+        try:
+            self.process.stdin.write(payload.encode())
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            self.returncode = self.process.wait()
+            return
+
+        # the sentinel is always preceded by a newline so that it starts a fresh line; hold
+        # back one line so that newline can be removed from the output before yielding it
+        pending = None
+        for raw_line in iter(self.process.stdout.readline, b""):
+            if raw_line.startswith(marker):
+                self.returncode = int(raw_line[len(marker) :])
+                self.ready = True
+                if pending is not None and pending != b"\n":
+                    yield pending
+                return
+            if pending is not None:
+                yield pending
+            pending = raw_line
+
+        # the shell itself exited before reporting back
+        self.returncode = self.process.wait()
+        if pending is not None:
+            yield pending
+
+    def close(self) -> None:
+        """
+        Shut down the shell process. A worker whose output was not read all the way to the
+        sentinel may still be running a command that is blocked writing to its stdout, so
+        it is killed rather than waited on.
+        """
+        if not self.ready:
+            self.process.kill()
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        self.process.stdout.close()
+
+
+class _ShellPool:
+    """
+    A thread-safe pool of idle `_ShellWorker`s, amortizing the cost of starting a new shell
+    process across many `ShellTask` runs. Workers inherit the environment of the current
+    process, and are only reused for commands with the same shell while that environment
+    is unchanged.
+
+    Args:
+        - size (int): the maximum number of idle workers to keep alive
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.pid = os.getpid()
+        self._idle = []  # type: List[_ShellWorker]
+        self._lock = threading.Lock()
+
+    def acquire(self, shell: str) -> _ShellWorker:
+        """
+        Retrieve an idle worker matching the provided shell and the current environment,
+        starting a new one if none is available.
+
+        Args:
+            - shell (str): the shell executable to run
+
+        Returns:
+            - _ShellWorker: a worker which is ready to execute a command
+        """
+        # workers keep the environment they were started with, so they may only be
+        # reused while it is unchanged; this snapshot costs about as much as a copy
+        key = (shell, frozenset(os.environ.items()))
+        stale = None
+        with self._lock:
+            for idx in range(len(self._idle) - 1, -1, -1):
+                if self._idle[idx].key == key:
+                    worker = self._idle.pop(idx)
+                    if worker.alive:
+                        return worker
+                    stale = worker
+                    break
+        if stale is not None:
+            stale.close()
+        return _ShellWorker(shell, None, key)
+
+    def release(self, worker: _ShellWorker) -> None:
+        """
+        Return a worker to the pool, shutting it down if it is no longer usable or the
+        pool is full.
+
+        Args:
+            - worker (_ShellWorker): the worker to return
+        """
+        stale = worker  # type: Optional[_ShellWorker]
+        if worker.ready and worker.alive and self.size > 0:
+            with self._lock:
+                self._idle.append(worker)
+                stale = self._idle.pop(0) if len(self._idle) > self.size else None
+        if stale is not None:
+            stale.close()
+
+    def close(self) -> None:
+        """
+        Shut down all idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+_pool = None  # type: Optional[_ShellPool]
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> Optional[_ShellPool]:
+    """
+    Retrieve the module-level shell pool, creating it on first use (or in a forked child,
+    which must not share its parent's workers). The configured `pool_size` is checked on
+    every call, and the pool is rebuilt whenever it changes.
+
+    Returns:
+        - _ShellPool: the shell pool, or `None` if pooling is disabled
+    """
+    global _pool
+    size = prefect.config.tasks.get("shell", {}).get("pool_size", 0)
+    if size is False:
+        size = os.cpu_count() or 1
+    size = int(size or 0)
+
+    stale = None
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid() and _pool.size != size:
+            stale, _pool = _pool, None
+        if _pool is not None and _pool.pid != os.getpid():
+            _pool = None
+        if _pool is None and size > 0:
+            _pool = _ShellPool(size=size)
+        pool = _pool
+    if stale is not None:
+        stale.close()
+    return pool
+
 
 class ShellTask(prefect.Task):
     """
@@ -15,7 +345,8 @@ class ShellTask(prefect.Task):
         - command (string, optional): shell command to be executed; can also be
             provided post-initialization by calling this task instance
         - env (dict, optional): dictionary of environment variables to use for
-            the subprocess; can also be provided at runtime
+            the subprocess, added on top of the environment of the current process;
+            can also be provided at runtime
         - helper_script (str, optional): a string representing a shell script, which
             will be executed prior to the `command` in the same process. Can be used to
             change directories, define helper functions, etc. when re-using this Task
@@ -29,6 +360,12 @@ class ShellTask(prefect.Task):
             defaults to `False`
         - **kwargs: additional keyword arguments to pass to the Task constructor
 
+    Note: commands which are a single program with plain arguments (and no `helper_script`)
+    are executed directly, without a shell, and all commands read stdin from `/dev/null`.
+    Setting `prefect.config.tasks.shell.pool_size` above 0 lets runs without a custom `env`
+    reuse idle POSIX shell processes. In pooled shells `$$` stays the same across runs, `$0`
+    is the shell name, and processes which outlive a command may write into later runs.
+
     Example:
         ```python
         from prefect import Flow
@@ -60,8 +397,34 @@ class ShellTask(prefect.Task):
         self.shell = shell
         self.return_all = return_all
         self.log_stderr = log_stderr
+        # the most recently classified (and split) command, keyed by everything that
+        # decides whether it can run without a shell
+        self._argv_cache = None  # type: Optional[tuple]
         super().__init__(**kwargs)
 
+    def _resolve_argv(self, command: str) -> Optional[List[str]]:
+        """
+        Determine the arguments for running a command directly, without a shell. The
+        result is cached, so repeated runs of the same command only classify it once.
+
+        Args:
+            - command (str): the shell command
+
+        Returns:
+            - List[str]: the arguments to execute, or `None` if the command requires a shell
+        """
+        key = (command, self.helper_script, self.shell)
+        # read the cache once, as another thread running this task may replace it
+        cached = self._argv_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        argv = None
+        if not self.helper_script and os.path.basename(self.shell) in _POSIX_SHELLS:
+            argv = _direct_argv(command)
+        self._argv_cache = (key, argv)
+        return argv
+
     @defaults_from_attrs("command", "env")
     def run(self, command: str = None, env: dict = None) -> str:
         """
@@ -73,7 +436,10 @@ class ShellTask(prefect.Task):
                 `self.helper_script` will be available in the same process this command
                 runs in
             - env (dict, optional): dictionary of environment variables to use for
-                the subprocess
+                the subprocess, overriding those of the current process; if `None` or
+                empty, the subprocess inherits the parent environment. Only runs without
+                a custom environment can reuse pooled shells, which are matched against a
+                snapshot of the current environment on every run
 
         Returns:
             - stdout (string): if `return_all` is `False` (the default), only
@@ -89,36 +455,169 @@ class ShellTask(prefect.Task):
         if command is None:
             raise TypeError("run() missing required argument: 'command'")
 
-        current_env = os.environ.copy()
-        current_env.update(env or {})
+        # only build a new environment when there is something to add to it, otherwise
+        # `env=None` lets a newly started process inherit ours
+        current_env = None
+        if env:
+            current_env = os.environ.copy()
+            current_env.update(env)
+
+        argv = self._resolve_argv(command)
+
+        result = None
+        if argv is not None:
+            result = self._run_direct(argv, current_env)
+        if result is None:
+            # pooled shells inherit our environment, so only runs without a custom one
+            # can reuse them
+            pool = None
+            if current_env is None and os.path.basename(self.shell) in _POSIX_SHELLS:
+                pool = _get_pool()
+            if pool is not None:
+                result = self._run_pooled(pool, command)
+            else:
+                result = self._run_script(command, current_env)
+        lines, line, returncode = result
+
+        if returncode:
+            msg = "Command failed with exit code {}".format(returncode)
+            self.logger.error(msg)
+
+            if self.log_stderr:
+                self.logger.error("\n".join(lines))
+
+            raise prefect.engine.signals.FAIL(msg) from None  # type: ignore
+        if self.return_all:
+            return lines
+        else:
+            return line
+
+    def _run_direct(
+        self, argv: List[str], env: Optional[dict]
+    ) -> Optional[Tuple[List[str], Optional[str], int]]:
+        """
+        Execute a simple command directly, skipping the extra fork / exec of a shell which
+        would otherwise sit between this process and the program.
+
+        Returns `None` if the program could not be started, so that the shell can report
+        the failure (or resolve the name itself) exactly as it would have otherwise.
+        """
+        try:
+            sub_process = _spawn(argv, env)
+        except OSError:
+            return None
+        with sub_process:
+            lines, line = self._read_output(sub_process.stdout)  # type: ignore
+        return lines, line, sub_process.returncode
+
+    def _run_pooled(
+        self, pool: _ShellPool, command: str
+    ) -> Tuple[List[str], Optional[str], int]:
+        """
+        Execute a command (and the helper script) in a reusable shell process.
+        """
+        script = command
+        if self.helper_script:
+            script = self.helper_script + "\n" + command
+        worker = pool.acquire(self.shell)
+        try:
+            lines, line = self._process_output(worker.execute(script))
+        finally:
+            pool.release(worker)
+        return lines, line, worker.returncode  # type: ignore
+
+    def _run_script(
+        self, command: str, env: Optional[dict]
+    ) -> Tuple[List[str], Optional[str], int]:
+        """
+        Execute a command (and the helper script) as a script file in a new shell process.
+        """
         with tempfile.NamedTemporaryFile(prefix="prefect-") as tmp:
             if self.helper_script:
                 tmp.write(self.helper_script.encode())
                 tmp.write("\n".encode())
             tmp.write(command.encode())
             tmp.flush()
-            sub_process = Popen(
-                [self.shell, tmp.name], stdout=PIPE, stderr=STDOUT, env=current_env
-            )
-            lines = []
-            line = None
-            for raw_line in iter(sub_process.stdout.readline, b""):
-                line = raw_line.decode("utf-8").rstrip()
-                if self.return_all:
-                    lines.append(line)
-                else:
-                    # if we're returning all, we don't log every line
-                    self.logger.debug(line)
+            sub_process = _spawn([self.shell, tmp.name], env)
+            lines, line = self._read_output(sub_process.stdout)  # type: ignore
             sub_process.wait()
-            if sub_process.returncode:
-                msg = "Command failed with exit code {}".format(sub_process.returncode,)
-                self.logger.error(msg)
+        return lines, line, sub_process.returncode
 
-                if self.log_stderr:
-                    self.logger.error("\n".join(lines))
+    def _read_output(self, stdout: IO[bytes]) -> Tuple[List[str], Optional[str]]:
+        """
+        Read the entire output of a process. Lines only need to be handled one at a time
+        when each is logged as it arrives. Otherwise the output is read in large chunks:
+        if all lines are returned they go into a single buffer which is decoded once, and
+        if only the last line is returned nothing but the last (partial) line is kept.
 
-                raise prefect.engine.signals.FAIL(msg) from None  # type: ignore
+        Args:
+            - stdout (IO[bytes]): the output stream of the process
+
+        Returns:
+            - Tuple[List[str], Optional[str]]: all collected lines and the last line seen
+        """
+        if not self.return_all and self.logger.isEnabledFor(logging.DEBUG):
+            return self._process_output(iter(stdout.readline, b""))
+
+        fd = stdout.fileno()
         if self.return_all:
-            return lines
-        else:
-            return line
+            buf = bytearray()
+            while True:
+                chunk = os.read(fd, 1 << 16)
+                if not chunk:
+                    break
+                buf += chunk
+
+            if not buf:
+                return [], None
+            # a trailing newline terminates the last line rather than starting a new one
+            if buf.endswith(b"\n"):
+                del buf[-1:]
+            lines = [line.rstrip() for line in buf.decode("utf-8").split("\n")]
+            return lines, lines[-1]
+
+        # `tail` holds everything after the last newline, and `last` the last complete
+        # line before it, which is the result if the output ends with a newline
+        tail = bytearray()
+        last = None  # type: Optional[bytes]
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            end = chunk.rfind(b"\n")
+            if end == -1:
+                tail += chunk
+                continue
+            start = chunk.rfind(b"\n", 0, end) + 1
+            last = bytes(tail + chunk[:end]) if start == 0 else chunk[start:end]
+            tail = bytearray(chunk[end + 1 :])
+
+        if tail:
+            last = bytes(tail)
+        if last is None:
+            return [], None
+        return [], last.decode("utf-8").rstrip()
+
+    def _process_output(
+        self, raw_lines: Iterator[bytes]
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Decode the output of a command, collecting all lines if `return_all` is set and
+        otherwise logging each one as it arrives.
+
+        Args:
+            - raw_lines (Iterator[bytes]): the raw lines of output
+
+        Returns:
+            - Tuple[List[str], Optional[str]]: all collected lines and the last line seen
+        """
+        lines = []
+        line = None
+        for raw_line in raw_lines:
+            line = raw_line.decode("utf-8").rstrip()
+            if self.return_all:
+                lines.append(line)
+            else:
+                # if we're returning all, we don't log every line
+                self.logger.debug(line)
+        return lines, line
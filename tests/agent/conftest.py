@@ -0,0 +1,124 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+import prefect.agent.agent as agent_module
+from prefect.agent import Agent
+from prefect.utilities.configuration import set_temporary_config
+
+
+@pytest.fixture()
+def mock_session(monkeypatch):
+    """
+    Patches `requests.Session` with a lightweight double whose `post()` returns a response
+    with the specified JSON body, or raises the specified exception.
+
+    The return value of the fixture is a function that is called on the JSON body (or with
+    `error=...`) to patch it; it returns the session double.
+    """
+
+    def _make(json_return=None, error=None):
+        def post(*args, **kwargs):
+            if error is not None:
+                raise error
+            return SimpleNamespace(
+                json=lambda: json_return, raise_for_status=lambda: None
+            )
+
+        session = SimpleNamespace(post=post, mount=lambda *args, **kwargs: None)
+        monkeypatch.setattr("requests.Session", lambda: session)
+        return session
+
+    return _make
+
+
+_TOKEN = {"cloud.agent.auth_token": "TEST_TOKEN"}
+_DEBUG = {**_TOKEN, "cloud.agent.level": "DEBUG"}
+_ADDRESS = {**_DEBUG, "cloud.agent.agent_address": "http://localhost:8000"}
+_ENV_VARS = {**_TOKEN, "cloud.agent.env_vars": {"test1": "test2", "test3": "test4"}}
+_LABELS = {"cloud.agent.labels": ["test", "2"]}
+
+
+@pytest.fixture(
+    params=[
+        (_TOKEN, {}, "logger.level", 20),
+        (_DEBUG, {}, "logger.level", 10),
+        (_ADDRESS, {}, "logger.level", 10),
+        (_ADDRESS, {}, "agent_address", "http://localhost:8000"),
+        (
+            _TOKEN,
+            {"env_vars": dict(AUTH_THING="foo")},
+            "env_vars",
+            {"AUTH_THING": "foo"},
+        ),
+        (_ENV_VARS, {}, "env_vars", {"test1": "test2", "test3": "test4"}),
+        (_TOKEN, {"max_polls": 10}, "max_polls", 10),
+        (_TOKEN, {"labels": ["test", "2"]}, "labels", ["test", "2"]),
+        (_LABELS, {}, "labels", ["test", "2"]),
+    ],
+    ids=[
+        "log-level",
+        "log-level-debug",
+        "log-level-responds-to-config",
+        "agent-address",
+        "env-vars",
+        "env-vars-from-config",
+        "max-polls",
+        "labels",
+        "labels-from-config",
+    ],
+)
+def configured_agent(request, runner_token, cloud_api):
+    """
+    Returns an `Agent` created with one set of config overrides and init kwargs, along with
+    the (dotted) name of an attribute to check and the value it is expected to have.
+    """
+    config, kwargs, attr, expected = request.param
+    with set_temporary_config(config):
+        agent = Agent(**kwargs)
+    return agent, attr, expected
+
+
+@pytest.fixture()
+def patch_client(monkeypatch):
+    """
+    Patches the `Client` class used by `prefect.agent.agent`.
+
+    The return value of the fixture is a function that is called on the replacement to
+    patch it in.
+    """
+
+    def _patch(client):
+        monkeypatch.setattr(agent_module, "Client", client)
+        return client
+
+    return _patch
+
+
+@pytest.fixture()
+def log_capture():
+    """
+    Collects the raw records logged by the default `agent` logger, without the formatting
+    and filtering done by `caplog`.
+
+    The return value of the fixture is the list of captured records.
+    """
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("agent")
+    logger.addHandler(handler)
+    yield records
+    logger.removeHandler(handler)
+
+
+@pytest.fixture(scope="module")
+def shared_agent():
+    """
+    A single default `Agent` shared by the tests of a module which only call methods that
+    leave it unchanged (or reset what they change). Agent construction doesn't depend on
+    the function-scoped `runner_token` / `cloud_api` fixtures, which only matter once an
+    agent is started or queries the API.
+    """
+    return Agent()
@@ -1,6 +1,8 @@
 import logging
+import operator
 import socket
 import time
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import pytest
@@ -11,27 +13,31 @@ from prefect.utilities.configuration import set_temporary_config
 from prefect.utilities.exceptions import AuthorizationError
 from prefect.utilities.graphql import GraphQLResult
 
+_SCHEDULED_SERIALIZED = Scheduled().serialize()
 
-def test_agent_init(runner_token, cloud_api):
-    agent = Agent()
-    assert agent
+
+def test_agent_init(shared_agent):
+    assert shared_agent
 
 
-def test_multiple_agent_init_doesnt_duplicate_logs(runner_token, cloud_api):
-    a, b, c = Agent(), Agent(), Agent()
+def test_multiple_agent_init_doesnt_duplicate_logs(
+    shared_agent, runner_token, cloud_api
+):
+    # the shared agent has already configured the `agent` logger
+    b, c = Agent(), Agent()
     assert len(c.logger.handlers) == 1
 
 
 def test_agent_config_options(runner_token, cloud_api):
     with set_temporary_config({"cloud.agent.auth_token": "TEST_TOKEN"}):
         agent = Agent()
-        assert agent.labels == []
-        assert agent.env_vars == dict()
-        assert agent.max_polls is None
-        assert agent.client.get_auth_token() == "TEST_TOKEN"
-        assert agent.name == "agent"
-        assert agent.logger
-        assert agent.logger.name == "agent"
+    assert agent.labels == []
+    assert agent.env_vars == dict()
+    assert agent.max_polls is None
+    assert agent.client.get_auth_token() == "TEST_TOKEN"
+    assert agent.name == "agent"
+    assert agent.logger
+    assert agent.logger.name == "agent"
 
 
 def test_agent_name_set_options(monkeypatch, runner_token, cloud_api):
@@ -48,70 +54,13 @@ def test_agent_name_set_options(monkeypatch, runner_token, cloud_api):
     # Config
     with set_temporary_config({"cloud.agent.name": "test2"}):
         agent = Agent()
-        assert agent.name == "test2"
-        assert agent.logger.name == "test2"
+    assert agent.name == "test2"
+    assert agent.logger.name == "test2"
 
 
-def test_agent_log_level(runner_token, cloud_api):
-    with set_temporary_config({"cloud.agent.auth_token": "TEST_TOKEN"}):
-        agent = Agent()
-        assert agent.logger.level == 20
-
-
-def test_agent_log_level_responds_to_config(runner_token, cloud_api):
-    with set_temporary_config(
-        {
-            "cloud.agent.auth_token": "TEST_TOKEN",
-            "cloud.agent.level": "DEBUG",
-            "cloud.agent.agent_address": "http://localhost:8000",
-        }
-    ):
-        agent = Agent()
-        assert agent.logger.level == 10
-        assert agent.agent_address == "http://localhost:8000"
-
-
-def test_agent_env_vars(runner_token, cloud_api):
-    with set_temporary_config({"cloud.agent.auth_token": "TEST_TOKEN"}):
-        agent = Agent(env_vars=dict(AUTH_THING="foo"))
-        assert agent.env_vars == dict(AUTH_THING="foo")
-
-
-def test_agent_env_vars_from_config(runner_token, cloud_api):
-    with set_temporary_config(
-        {
-            "cloud.agent.auth_token": "TEST_TOKEN",
-            "cloud.agent.env_vars": {"test1": "test2", "test3": "test4"},
-        }
-    ):
-        agent = Agent()
-        assert agent.env_vars == {"test1": "test2", "test3": "test4"}
-
-
-def test_agent_max_polls(runner_token, cloud_api):
-    with set_temporary_config({"cloud.agent.auth_token": "TEST_TOKEN"}):
-        agent = Agent(max_polls=10)
-        assert agent.max_polls == 10
-
-
-def test_agent_labels(runner_token, cloud_api):
-    with set_temporary_config({"cloud.agent.auth_token": "TEST_TOKEN"}):
-        agent = Agent(labels=["test", "2"])
-        assert agent.labels == ["test", "2"]
-
-
-def test_agent_labels_from_config_var(runner_token):
-    with set_temporary_config({"cloud.agent.labels": ["test", "2"]}):
-        agent = Agent()
-        assert agent.labels == ["test", "2"]
-
-
-def test_agent_log_level_debug(runner_token):
-    with set_temporary_config(
-        {"cloud.agent.auth_token": "TEST_TOKEN", "cloud.agent.level": "DEBUG"}
-    ):
-        agent = Agent()
-        assert agent.logger.level == 10
+def test_agent_options(configured_agent):
+    agent, attr, expected = configured_agent
+    assert operator.attrgetter(attr)(agent) == expected
 
 
 def test_agent_fails_no_auth_token(cloud_api):
@@ -119,36 +68,25 @@ def test_agent_fails_no_auth_token(cloud_api):
         agent = Agent().start()
 
 
-def test_agent_fails_no_runner_token(monkeypatch, cloud_api):
-    post = MagicMock(
-        return_value=MagicMock(
-            json=MagicMock(
-                return_value=dict(
-                    data=dict(auth_info=MagicMock(api_token_scope="USER"))
-                )
-            )
-        )
-    )
-    session = MagicMock()
-    session.return_value.post = post
-    monkeypatch.setattr("requests.Session", session)
+def test_agent_fails_no_runner_token(mock_session, cloud_api):
+    mock_session(dict(data=dict(auth_info=dict(api_token_scope="USER"))))
 
     with pytest.raises(AuthorizationError):
         agent = Agent().start()
 
 
-def test_query_flow_runs(monkeypatch, runner_token, cloud_api):
+def test_query_flow_runs(patch_client, runner_token, cloud_api):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(
-                get_runs_in_queue=MagicMock(flow_run_ids=["id"]),
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(
+                get_runs_in_queue=SimpleNamespace(flow_run_ids=["id"]),
                 flow_run=[{"id": "id"}],
             )
         )
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     agent = Agent()
     flow_runs = agent.query_flow_runs()
@@ -156,19 +94,19 @@ def test_query_flow_runs(monkeypatch, runner_token, cloud_api):
 
 
 def test_query_flow_runs_ignores_currently_submitting_runs(
-    monkeypatch, runner_token, cloud_api
+    patch_client, runner_token, cloud_api
 ):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(
-                get_runs_in_queue=MagicMock(flow_run_ids=["id1", "id2"]),
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(
+                get_runs_in_queue=SimpleNamespace(flow_run_ids=["id1", "id2"]),
                 flow_run=[{"id1": "id1"}],
             )
         )
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     agent = Agent()
     agent.submitting_flow_runs.add("id2")
@@ -182,19 +120,21 @@ def test_query_flow_runs_ignores_currently_submitting_runs(
 
 
 def test_query_flow_runs_does_not_use_submitting_flow_runs_directly(
-    monkeypatch, runner_token, caplog, cloud_api
+    patch_client, runner_token, log_capture, cloud_api
 ):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(
-                get_runs_in_queue=MagicMock(flow_run_ids=["already-submitted-id"]),
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(
+                get_runs_in_queue=SimpleNamespace(
+                    flow_run_ids=["already-submitted-id"]
+                ),
                 flow_run=[{"id": "id"}],
             )
         )
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     agent = Agent()
     agent.logger.setLevel(logging.DEBUG)
@@ -204,26 +144,28 @@ def test_query_flow_runs_does_not_use_submitting_flow_runs_directly(
     flow_runs = agent.query_flow_runs()
 
     assert flow_runs == []
-    assert "1 already submitting: ['already-submitted-id']" in caplog.text
+    assert any(
+        "1 already submitting: ['already-submitted-id']" in r.msg for r in log_capture
+    )
     copy_mock.assert_called_once_with()
 
 
-def test_update_states_passes_no_task_runs(monkeypatch, runner_token, cloud_api):
+def test_update_states_passes_no_task_runs(patch_client, runner_token, cloud_api):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(set_flow_run_state=None, set_task_run_state=None)
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(set_flow_run_state=None, set_task_run_state=None)
         )
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     agent = Agent()
     assert not agent.update_state(
         flow_run=GraphQLResult(
             {
                 "id": "id",
-                "serialized_state": Scheduled().serialize(),
+                "serialized_state": _SCHEDULED_SERIALIZED,
                 "version": 1,
                 "task_runs": [],
             }
@@ -231,29 +173,29 @@ def test_update_states_passes_no_task_runs(monkeypatch, runner_token, cloud_api)
     )
 
 
-def test_update_states_passes_task_runs(monkeypatch, runner_token, cloud_api):
+def test_update_states_passes_task_runs(patch_client, runner_token, cloud_api):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(set_flow_run_state=None, set_task_run_state=None)
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(set_flow_run_state=None, set_task_run_state=None)
         )
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     agent = Agent()
     assert not agent.update_state(
         flow_run=GraphQLResult(
             {
                 "id": "id",
-                "serialized_state": Scheduled().serialize(),
+                "serialized_state": _SCHEDULED_SERIALIZED,
                 "version": 1,
                 "task_runs": [
                     GraphQLResult(
                         {
                             "id": "id",
                             "version": 1,
-                            "serialized_state": Scheduled().serialize(),
+                            "serialized_state": _SCHEDULED_SERIALIZED,
                         }
                     )
                 ],
@@ -262,22 +204,22 @@ def test_update_states_passes_task_runs(monkeypatch, runner_token, cloud_api):
     )
 
 
-def test_mark_failed(monkeypatch, runner_token, cloud_api):
+def test_mark_failed(patch_client, runner_token, cloud_api):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(set_flow_run_state=None, set_task_run_state=None)
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(set_flow_run_state=None, set_task_run_state=None)
         )
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     agent = Agent()
     assert not agent.mark_failed(
         flow_run=GraphQLResult(
             {
                 "id": "id",
-                "serialized_state": Scheduled().serialize(),
+                "serialized_state": _SCHEDULED_SERIALIZED,
                 "version": 1,
                 "task_runs": [],
             }
@@ -286,63 +228,55 @@ def test_mark_failed(monkeypatch, runner_token, cloud_api):
     )
 
 
-def test_deploy_flows_passes_base_agent(runner_token, cloud_api):
-    agent = Agent()
+def test_deploy_flows_passes_base_agent(shared_agent):
     with pytest.raises(NotImplementedError):
-        agent.deploy_flow(None)
+        shared_agent.deploy_flow(None)
 
 
-def test_heartbeat_passes_base_agent(runner_token, cloud_api):
-    agent = Agent()
-    assert not agent.heartbeat()
+def test_heartbeat_passes_base_agent(shared_agent):
+    assert not shared_agent.heartbeat()
 
 
-def test_agent_connect(monkeypatch, runner_token, cloud_api):
-    post = MagicMock(return_value=MagicMock(json=MagicMock(return_value="hello")))
-    session = MagicMock()
-    session.return_value.post = post
-    monkeypatch.setattr("requests.Session", session)
+def test_agent_connect(mock_session, runner_token, cloud_api):
+    mock_session(dict(data=dict(hello="hello")))
 
     agent = Agent()
     assert agent.agent_connect() is None
 
 
-def test_agent_connect_handled_error(monkeypatch, runner_token, cloud_api):
-    post = MagicMock(side_effect=Exception)
-    session = MagicMock()
-    session.return_value.post = post
-    monkeypatch.setattr("requests.Session", session)
+def test_agent_connect_handled_error(mock_session, runner_token, cloud_api):
+    mock_session(error=Exception())
 
     agent = Agent()
     assert agent.agent_connect() is None
 
 
-def test_on_flow_run_deploy_attempt_removes_id(monkeypatch, runner_token, cloud_api):
-    agent = Agent()
-    agent.submitting_flow_runs.add("id")
-    agent.on_flow_run_deploy_attempt(None, "id")
-    assert len(agent.submitting_flow_runs) == 0
+def test_on_flow_run_deploy_attempt_removes_id(shared_agent):
+    shared_agent.submitting_flow_runs.clear()
+    shared_agent.submitting_flow_runs.add("id")
+    shared_agent.on_flow_run_deploy_attempt(None, "id")
+    assert len(shared_agent.submitting_flow_runs) == 0
 
 
-def test_agent_process(monkeypatch, runner_token, cloud_api):
+def test_agent_process(patch_client, runner_token, cloud_api):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(
                 set_flow_run_state=None,
                 set_task_run_state=None,
-                get_runs_in_queue=MagicMock(flow_run_ids=["id"]),
+                get_runs_in_queue=SimpleNamespace(flow_run_ids=["id"]),
                 flow_run=[
                     GraphQLResult(
                         {
                             "id": "id",
-                            "serialized_state": Scheduled().serialize(),
+                            "serialized_state": _SCHEDULED_SERIALIZED,
                             "version": 1,
                             "task_runs": [
                                 GraphQLResult(
                                     {
                                         "id": "id",
                                         "version": 1,
-                                        "serialized_state": Scheduled().serialize(),
+                                        "serialized_state": _SCHEDULED_SERIALIZED,
                                     }
                                 )
                             ],
@@ -354,7 +288,7 @@ def test_agent_process(monkeypatch, runner_token, cloud_api):
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     executor = MagicMock()
     future_mock = MagicMock()
@@ -366,20 +300,20 @@ def test_agent_process(monkeypatch, runner_token, cloud_api):
     assert future_mock.add_done_callback.called
 
 
-def test_agent_process_no_runs_found(monkeypatch, runner_token, cloud_api):
+def test_agent_process_no_runs_found(patch_client, runner_token, cloud_api):
     gql_return = MagicMock(
-        return_value=MagicMock(
-            data=MagicMock(
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(
                 set_flow_run_state=None,
                 set_task_run_state=None,
-                get_runs_in_queue=MagicMock(flow_run_ids=["id"]),
+                get_runs_in_queue=SimpleNamespace(flow_run_ids=["id"]),
                 flow_run=[],
             )
         )
     )
     client = MagicMock()
     client.return_value.graphql = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     executor = MagicMock()
 
@@ -388,13 +322,17 @@ def test_agent_process_no_runs_found(monkeypatch, runner_token, cloud_api):
     assert not executor.submit.called
 
 
-def test_agent_logs_flow_run_exceptions(monkeypatch, runner_token, caplog, cloud_api):
+def test_agent_logs_flow_run_exceptions(
+    patch_client, runner_token, log_capture, cloud_api
+):
     gql_return = MagicMock(
-        return_value=MagicMock(data=MagicMock(write_run_logs=MagicMock(success=True)))
+        return_value=SimpleNamespace(
+            data=SimpleNamespace(write_run_logs=SimpleNamespace(success=True))
+        )
     )
     client = MagicMock()
     client.return_value.write_run_logs = gql_return
-    monkeypatch.setattr("prefect.agent.agent.Client", MagicMock(return_value=client))
+    patch_client(MagicMock(return_value=client))
 
     agent = Agent()
     agent.deploy_flow = MagicMock(side_effect=Exception("Error Here"))
@@ -402,14 +340,14 @@ def test_agent_logs_flow_run_exceptions(monkeypatch, runner_token, caplog, cloud
         flow_run=GraphQLResult(
             {
                 "id": "id",
-                "serialized_state": Scheduled().serialize(),
+                "serialized_state": _SCHEDULED_SERIALIZED,
                 "version": 1,
                 "task_runs": [
                     GraphQLResult(
                         {
                             "id": "id",
                             "version": 1,
-                            "serialized_state": Scheduled().serialize(),
+                            "serialized_state": _SCHEDULED_SERIALIZED,
                         }
                     )
                 ],
@@ -421,13 +359,13 @@ def test_agent_logs_flow_run_exceptions(monkeypatch, runner_token, caplog, cloud
     client.write_run_logs.assert_called_with(
         [dict(flow_run_id="id", level="ERROR", message="Error Here", name="agent")]
     )
-    assert "Logging platform error for flow run" in caplog.text
+    assert any("Logging platform error for flow run" in r.msg for r in log_capture)
 
 
-def test_agent_process_raises_exception_and_logs(monkeypatch, runner_token, cloud_api):
+def test_agent_process_raises_exception_and_logs(patch_client, runner_token, cloud_api):
     client = MagicMock()
     client.return_value.graphql.side_effect = ValueError("Error")
-    monkeypatch.setattr("prefect.agent.agent.Client", client)
+    patch_client(client)
 
     executor = MagicMock()
 
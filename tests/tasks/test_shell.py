@@ -1,12 +1,18 @@
+import logging
 import os
 import shutil
 import sys
 import tempfile
+import threading
+import tracemalloc
+from subprocess import Popen
+from unittest.mock import MagicMock
 
 import pytest
 
 from prefect import Flow
-from prefect.tasks.shell import ShellTask
+from prefect.tasks.shell import ShellTask, _direct_argv, _get_pool
+from prefect.utilities.configuration import set_temporary_config
 from prefect.utilities.debug import raise_on_exception
 
 pytestmark = pytest.mark.skipif(
@@ -14,6 +20,14 @@ pytestmark = pytest.mark.skipif(
 )
 
 
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr("prefect.tasks.shell._pool", None)
+    with set_temporary_config({"tasks.shell.pool_size": 2}):
+        yield
+        _get_pool().close()
+
+
 def test_shell_initializes_and_runs_basic_cmd():
     with Flow(name="test") as f:
         task = ShellTask()(command="echo -n 'hello world'")
@@ -88,6 +102,24 @@ def test_shell_task_accepts_env():
     assert out.result[task].result == "test"
 
 
+@pytest.mark.parametrize("env", [None, {}])
+def test_shell_task_inherits_env_if_not_provided(monkeypatch, env):
+    popen = MagicMock(side_effect=Popen)
+    monkeypatch.setattr("prefect.tasks.shell.Popen", popen)
+    monkeypatch.setenv("MYTESTVAR", "42")
+    task = ShellTask()
+    assert task.run(command="printenv MYTESTVAR", env=env) == "42"
+    assert popen.call_args[1]["env"] is None
+    assert task.run(command="echo -n $MYTESTVAR", env=env) == "42"
+
+
+def test_shell_task_env_is_added_to_current_env(monkeypatch):
+    monkeypatch.setenv("MYTESTVAR", "42")
+    task = ShellTask(return_all=True)
+    result = task.run(command="echo $MYTESTVAR $OTHERVAR", env=dict(OTHERVAR="test"))
+    assert result == ["42 test"]
+
+
 def test_shell_task_env_can_be_set_at_init():
     with Flow(name="test") as f:
         task = ShellTask(env=dict(MYTESTVAR="test"))(command="echo -n $MYTESTVAR")
@@ -199,3 +231,238 @@ def test_shell_sources_helper_script_correctly():
     out = f.run()
     assert out.is_successful()
     assert out.result[res].result == "chris"
+
+
+def test_shell_does_not_reuse_shell_processes_by_default():
+    task = ShellTask()
+    first = task.run(command="echo -n $$")
+    second = task.run(command="echo -n $$")
+    assert first != second
+
+
+def test_shell_reuses_shell_processes(pooled):
+    task = ShellTask()
+    first = task.run(command="echo -n $$")
+    second = task.run(command="echo -n $$")
+    assert first == second
+
+
+def test_shell_does_not_pool_runs_with_custom_env(pooled, monkeypatch):
+    pool = MagicMock()
+    monkeypatch.setattr("prefect.tasks.shell._get_pool", pool)
+    task = ShellTask()
+    assert task.run(command="echo -n $MYTESTVAR", env=dict(MYTESTVAR="test")) == "test"
+    assert not pool.called
+
+
+def test_shell_rebuilds_pool_when_its_size_changes(pooled):
+    task = ShellTask()
+    first = task.run(command="echo -n $$")
+    with set_temporary_config({"tasks.shell.pool_size": 3}):
+        assert _get_pool().size == 3
+        second = task.run(command="echo -n $$")
+    assert first != second
+
+
+def test_shell_does_not_leak_state_between_commands(pooled):
+    task = ShellTask()
+    task.run(command="cd / && export MYLEAKVAR=42 && exit 0")
+    assert task.run(command="echo -n ${MYLEAKVAR:-unset}") == "unset"
+
+
+@pytest.mark.parametrize("pool_size", [0, 2])
+@pytest.mark.parametrize("command", ["cat", "cat; true"])
+def test_shell_commands_read_stdin_from_devnull(monkeypatch, command, pool_size):
+    monkeypatch.setattr("prefect.tasks.shell._pool", None)
+    read, write = os.pipe()
+    os.write(write, b"FROMPARENT\n")
+    os.close(write)
+    saved = os.dup(0)
+    os.dup2(read, 0)
+    os.close(read)
+    try:
+        with set_temporary_config({"tasks.shell.pool_size": pool_size}):
+            assert ShellTask().run(command=command) is None
+    finally:
+        os.dup2(saved, 0)
+        os.close(saved)
+
+
+def test_shell_task_fails_on_syntax_error():
+    with Flow(name="test") as f:
+        task = ShellTask()(command='echo "unterminated')
+    out = f.run()
+    assert out.is_failed()
+    assert "Command failed with exit code" in str(out.result[task].message)
+
+
+@pytest.mark.parametrize(
+    "command,argv",
+    [
+        ("ls", ["ls"]),
+        ("ls -la /tmp", ["ls", "-la", "/tmp"]),
+        ("  ls  surely_a_dir  ", ["ls", "surely_a_dir"]),
+        ("echo -n 'hello world'", None),
+        ("echo $HOME", None),
+        ("ls | wc -l", None),
+        ("ls *.py", None),
+        ("ls\nls", None),
+        ("cd /tmp", None),
+        ("exit 1", None),
+        ("echo --help", None),
+        ("printf hello", None),
+        ("pwd", None),
+        ("test -d /tmp", None),
+        ("[ -d /tmp ]", None),
+        ("kill -0 1", None),
+        ("true", None),
+        ("false", None),
+        ("print hello", None),
+        ("FOO=bar env", None),
+        ("", None),
+    ],
+)
+def test_shell_direct_argv(command, argv):
+    assert _direct_argv(command) == argv
+
+
+def test_shell_runs_simple_commands_without_a_shell(monkeypatch):
+    pool = MagicMock()
+    monkeypatch.setattr("prefect.tasks.shell._get_pool", pool)
+    task = ShellTask(return_all=True)
+    assert task.run(command="basename /tmp/hello") == ["hello"]
+    assert not pool.called
+
+
+def test_shell_runs_builtins_shadowing_executables_in_the_shell():
+    task = ShellTask(return_all=True)
+    assert task.run(command="echo --help") == task.run(command="echo --help; true")
+
+
+def test_shell_splits_repeated_commands_once(monkeypatch):
+    split = MagicMock(side_effect=_direct_argv)
+    monkeypatch.setattr("prefect.tasks.shell._direct_argv", split)
+    task = ShellTask(command="basename /tmp/hello")
+    assert task.run() == "hello"
+    assert task.run() == "hello"
+    assert split.call_count == 1
+    assert task.run(command="basename /tmp/world") == "world"
+    assert split.call_count == 2
+
+
+def test_shell_does_not_split_commands_requiring_a_shell():
+    assert ShellTask(helper_script="cd ~")._resolve_argv("ls") is None
+    assert ShellTask(shell="fish")._resolve_argv("ls") is None
+
+
+def test_shell_respects_attributes_changed_after_init(monkeypatch, tmpdir):
+    monkeypatch.chdir(tmpdir)
+    task = ShellTask(command="pwd")
+    assert task.run() == str(tmpdir)
+    task.helper_script = "cd /"
+    assert task.run() == "/"
+    task.helper_script = None
+    assert task.run() == str(tmpdir)
+
+
+def test_shell_builtins_still_run_in_a_shell():
+    with Flow(name="test") as f:
+        task = ShellTask()(command="exit 3")
+    out = f.run()
+    assert out.is_failed()
+    assert "Command failed with exit code 3" in str(out.result[task].message)
+
+
+def test_shell_missing_program_is_reported_by_the_shell():
+    with Flow(name="test") as f:
+        task = ShellTask()(command="surely_a_program_that_doesnt_exist")
+    out = f.run()
+    assert out.is_failed()
+    assert "Command failed with exit code 127" in str(out.result[task].message)
+
+
+@pytest.mark.parametrize("return_all", [True, False])
+def test_shell_handles_large_output(return_all):
+    task = ShellTask(return_all=return_all)
+    result = task.run(command="seq 1 100000")
+    if return_all:
+        assert result == [str(i) for i in range(1, 100001)]
+    else:
+        assert result == "100000"
+
+
+@pytest.mark.parametrize(
+    "output,expected",
+    [("hi", "hi"), ("hi\n", "hi"), ("hi\n\n", ""), ("\n", ""), ("", None)],
+)
+def test_shell_returns_last_line_of_buffered_output(tmpdir, output, expected):
+    path = tmpdir.join("output.txt")
+    path.write(output)
+    task = ShellTask()
+    assert task.run(command="cat {}".format(path)) == expected
+
+
+def test_shell_only_keeps_last_line_of_output_in_memory():
+    task = ShellTask()
+    tracemalloc.start()
+    try:
+        # roughly 38MB of output
+        assert task.run(command="seq 1 5000000") == "5000000"
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 5 * 1024 * 1024
+
+
+def test_shell_logs_each_line_when_debugging(caplog):
+    caplog.set_level(logging.DEBUG, logger="prefect.ShellTask")
+    task = ShellTask()
+    assert task.run(command="seq 1 3") == "3"
+    debug_log = [c.message for c in caplog.records if c.levelname == "DEBUG"]
+    assert debug_log == ["1", "2", "3"]
+
+
+@pytest.mark.parametrize("close_fds", [True, False])
+def test_shell_close_fds_can_be_configured(monkeypatch, close_fds):
+    popen = MagicMock(side_effect=Popen)
+    monkeypatch.setattr("prefect.tasks.shell.Popen", popen)
+    with set_temporary_config({"tasks.shell.close_fds": close_fds}):
+        assert ShellTask().run(command="printf hello") == "hello"
+    assert popen.call_args[1]["close_fds"] is close_fds
+
+
+def test_shell_does_not_hang_if_output_handling_fails(pooled):
+    errors = []
+
+    def run():
+        try:
+            ShellTask().run(command="printf '\\xff\\n'; seq 1 200000; true")
+        except Exception as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert len(errors) == 1
+    assert isinstance(errors[0], UnicodeDecodeError)
+
+
+def test_shell_reused_shell_processes_follow_current_directory(
+    pooled, monkeypatch, tmpdir
+):
+    task = ShellTask(return_all=True)
+    first_pid, _ = task.run(command="echo $$; pwd")
+    monkeypatch.chdir(tmpdir)
+    second_pid, cwd = task.run(command="echo $$; pwd")
+    assert first_pid == second_pid
+    assert cwd == str(tmpdir)
+
+
+def test_shell_waits_for_background_jobs_before_reusing_shell_processes(pooled):
+    task = ShellTask(return_all=True)
+    assert task.run(command="(sleep 0.3; echo late) & echo first") == [
+        "first",
+        "late",
+    ]
+    assert task.run(command="echo second; true") == ["second"]